@@ -1,14 +1,18 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
-from scipy.stats import norm
+from scipy.special import ndtr
 import plotly.graph_objects as go
 from numpy import log, sqrt, exp  # Make sure to import these
-import matplotlib.pyplot as plt
-import seaborn as sns
-import yahoo_fin.stock_info as si
-import yfinance as yf
+from pricing_kernel import heatmap_prices
+
+# Optional compiled scalar pricer (python setup.py build_ext --inplace); falls back to NumPy
+try:
+    from bs_pricer import price as _compiled_price
+except ImportError:
+    _compiled_price = None
 from equities_options_toolkit import (
+    VIX_FALLBACK,
+    get_current_vix,
     vix_dynamic_allocation,
     kelly_criterion_allocation
 )
@@ -76,10 +80,11 @@ class BlackScholes:
         volatility: float,
         interest_rate: float,
     ):
-        self.time_to_maturity = time_to_maturity / 365.0 # Convert days to years
-        self.strike = strike
-        self.current_price = current_price
-        self.volatility = volatility
+        # Inputs may be scalars or NumPy arrays; arrays are priced via broadcasting
+        self.time_to_maturity = np.asarray(time_to_maturity, dtype=np.float64) / 365.0 # Convert days to years
+        self.strike = np.asarray(strike, dtype=np.float64)
+        self.current_price = np.asarray(current_price, dtype=np.float64)
+        self.volatility = np.asarray(volatility, dtype=np.float64)
         self.interest_rate = interest_rate
 
     def calculate_prices(
@@ -91,35 +96,47 @@ class BlackScholes:
         volatility = self.volatility
         interest_rate = self.interest_rate
 
-        d1 = (
-            log(current_price / strike) +
-            (interest_rate + 0.5 * volatility ** 2) * time_to_maturity
-            ) / (
-                volatility * sqrt(time_to_maturity)
-            )
-        d2 = d1 - volatility * sqrt(time_to_maturity)
-
-        call_price = current_price * norm.cdf(d1) - (
-            strike * exp(-(interest_rate * time_to_maturity)) * norm.cdf(d2)
+        scalar_inputs = all(
+            np.ndim(x) == 0 for x in (time_to_maturity, strike, current_price, volatility, interest_rate)
         )
-        put_price = (
-            strike * exp(-(interest_rate * time_to_maturity)) * norm.cdf(-d2)
-        ) - current_price * norm.cdf(-d1)
+        if _compiled_price is not None and scalar_inputs:
+            call_price, put_price, Nd1, call_gamma = _compiled_price(
+                float(current_price), float(strike), float(time_to_maturity),
+                float(interest_rate), float(volatility)
+            )
+        else:
+            # Hoist the shared sqrt/exp terms so each is evaluated once
+            sqrt_T = sqrt(time_to_maturity)
+            v_sqrt_T = volatility * sqrt_T
+            discount = strike * exp(-interest_rate * time_to_maturity)
+
+            d1 = (
+                log(current_price / strike) +
+                (interest_rate + 0.5 * volatility * volatility) * time_to_maturity
+                ) / v_sqrt_T
+            d2 = d1 - v_sqrt_T
+
+            Nd1 = ndtr(d1)
+            Nd2 = ndtr(d2)
+            call_price = current_price * Nd1 - discount * Nd2
+            put_price = discount * (1.0 - Nd2) - current_price * (1.0 - Nd1)
+
+            call_gamma = exp(-0.5 * d1 * d1) / sqrt(2 * np.pi) / (
+                strike * v_sqrt_T
+            )
 
         self.call_price = call_price
         self.put_price = put_price
 
         # GREEKS
         # Delta
-        self.call_delta = norm.cdf(d1)
-        self.put_delta = 1 - norm.cdf(d1)
+        self.call_delta = Nd1
+        self.put_delta = self.call_delta - 1.0
         call_delta = self.call_delta 
         put_delta = self.put_delta
 
         # Gamma
-        self.call_gamma = norm.pdf(d1) / (
-            strike * volatility * sqrt(time_to_maturity)
-        )
+        self.call_gamma = call_gamma
         self.put_gamma = self.call_gamma
 
         return call_price, put_price, call_delta, put_delta
@@ -164,15 +181,15 @@ with st.sidebar:
         help="Enter your total account size for position sizing calculations"
     )
 
-    max_premium_allocation = vix_dynamic_allocation(balance=account_size)
-
     try:
-        vix_ticker = yf.Ticker('^VIX')
-        data_vix = vix_ticker.history(period='1d', interval='1d')
-        current_vix = data_vix['Close'].iloc[-1].round(2)
+        current_vix = get_current_vix()
         st.info(f"Current VIX: {current_vix:.2f}")
     except Exception as e:
-        st.warning("Unable to fetch current VIX level")
+        # Pass the fallback level on so vix_dynamic_allocation doesn't retry the fetch
+        current_vix = VIX_FALLBACK
+        st.warning(f"Unable to fetch current VIX level, using {VIX_FALLBACK}")
+
+    max_premium_allocation = vix_dynamic_allocation(balance=account_size, vix=current_vix)
     
     st.info(f"Maximum premium allocation based on VIX: ${max_premium_allocation:.2f} "
             f"({(max_premium_allocation/account_size)*100:.1f}% of account)")
@@ -219,129 +236,130 @@ with st.sidebar:
     )
 
     st.markdown("---")
-    calculate_btn = st.button('Heatmap Parameters')
+    st.subheader("Heatmap Parameters")
     spot_min = st.number_input('Min Spot Price', min_value=0.01, value=current_price*0.8, step=0.0001)
     spot_max = st.number_input('Max Spot Price', min_value=0.01, value=current_price*1.2, step=0.0001)
     vol_min = st.slider('Min Volatility for Heatmap', min_value=0.01, max_value=1.0, value=volatility*0.5, step=0.0005)
     vol_max = st.slider('Max Volatility for Heatmap', min_value=0.01, max_value=1.0, value=volatility*1.5, step=0.0005)
     
-    spot_range = np.linspace(spot_min, spot_max, 10)
-    vol_range = np.linspace(vol_min, vol_max, 10)
+    # Only rebuild the grid axes when their bounds change
+    range_key = (spot_min, spot_max, vol_min, vol_max)
+    if st.session_state.get('heatmap_range_key') != range_key:
+        st.session_state['heatmap_range_key'] = range_key
+        st.session_state['spot_range'] = np.linspace(spot_min, spot_max, 10)
+        st.session_state['vol_range'] = np.linspace(vol_min, vol_max, 10)
+    spot_range = st.session_state['spot_range']
+    vol_range = st.session_state['vol_range']
 
 
 
-def plot_heatmap(bs_model, spot_range, vol_range, strike, position_units, viz_type):
+@st.cache_data(max_entries=32, show_spinner=False)
+def compute_heatmap_matrices(time_to_maturity, strike, interest_rate, spot_range, vol_range, position_units, viz_type, initial_call, initial_put):
     """
-    Generate heatmaps for either option prices or P&L analysis with corrected volatility implementation
+    Compute the call and put matrices shown in the heatmaps, either as option prices or as position P&L.
+    Results are cached on the inputs, so changing unrelated widgets does not reprice the grid.
     
     Parameters:
     -----------
-    bs_model : BlackScholes
-        Instance of BlackScholes class containing initial parameters
-    spot_range : numpy.ndarray
-        Array of spot prices to analyze
-    vol_range : numpy.ndarray
-        Array of volatility values to analyze
+    time_to_maturity : float
+        Time to maturity in years
     strike : float
         Strike price of the option
+    interest_rate : float
+        Risk-free interest rate
+    spot_range : tuple
+        Spot prices to analyze
+    vol_range : tuple
+        Volatility values to analyze
     position_units : int
         Number of contracts/units
     viz_type : str
         Type of visualization ('Option Prices' or 'Position P&L')
+    initial_call : float
+        Current call price, used as the P&L reference
+    initial_put : float
+        Current put price, used as the P&L reference
         
     Returns:
     --------
     tuple
-        Two matplotlib figures for call and put options
+        Call and put matrices, rows following vol_range and columns following spot_range
     """
-    call_matrix = np.zeros((len(vol_range), len(spot_range)))
-    put_matrix = np.zeros((len(vol_range), len(spot_range)))
-
-    # Get initial option prices for P&L calculation
-    initial_bs = BlackScholes(
-        time_to_maturity=bs_model.time_to_maturity,
-        strike=strike,
-        current_price=bs_model.current_price,
-        volatility=bs_model.volatility,
-        interest_rate=bs_model.interest_rate
+    # Price the whole grid at once: rows follow vol_range, columns follow spot_range
+    call_matrix, put_matrix = heatmap_prices(
+        np.asarray(spot_range, dtype=np.float64),
+        np.asarray(vol_range, dtype=np.float64),
+        time_to_maturity,
+        interest_rate,
+        strike
     )
-    initial_call, initial_put = initial_bs.calculate_prices()[:2]
 
-    # Calculate matrices for both options, using volatility from vol_range
-    for i, vol in enumerate(vol_range):
-        for j, spot in enumerate(spot_range):
-            bs_temp = BlackScholes(
-                time_to_maturity=bs_model.time_to_maturity,
-                strike=strike,
-                current_price=spot,
-                volatility=vol,  # Use the volatility from vol_range
-                interest_rate=bs_model.interest_rate
-            )
-            call_price, put_price = bs_temp.calculate_prices()[:2]
-            
-            if viz_type == "Position P&L":
-                # Calculate P&L for both options
-                call_matrix[i, j] = (call_price - initial_call) * position_units * 100  # Multiply by 100 for contract size
-                put_matrix[i, j] = (put_price - initial_put) * position_units * 100
-            else:
-                # Store raw prices
-                call_matrix[i, j] = call_price
-                put_matrix[i, j] = put_price
+    if viz_type == "Position P&L":
+        # Calculate P&L for both options
+        call_matrix = (call_matrix - initial_call) * position_units * 100  # Multiply by 100 for contract size
+        put_matrix = (put_matrix - initial_put) * position_units * 100
+
+    return call_matrix, put_matrix
+
+
+def render_heatmap(matrix, spot_range, vol_range, viz_type, option_label, center_matrix=None):
+    """
+    Build a plotly heatmap for a call or put matrix
     
-    # Create figures with appropriate formatting
-    fmt = ".2f" if viz_type == "Position P&L" else ".4f"
+    Parameters:
+    -----------
+    matrix : numpy.ndarray
+        Prices or P&L values, as returned by compute_heatmap_matrices
+    spot_range : array-like
+        Spot prices on the x axis
+    vol_range : array-like
+        Volatility values on the y axis
+    viz_type : str
+        Type of visualization ('Option Prices' or 'Position P&L')
+    option_label : str
+        'CALL' or 'PUT', used in the title
+    center_matrix : numpy.ndarray, optional
+        Matrix used to set the symmetric P&L color range (defaults to matrix)
+        
+    Returns:
+    --------
+    plotly.graph_objects.Figure
+    """
+    decimals = 2 if viz_type == "Position P&L" else 4
     title_prefix = "P&L" if viz_type == "Position P&L" else "Price"
     
     # Use diverging colormap for P&L and sequential for prices
-    cmap = "RdYlGn" if viz_type == "Position P&L" else "viridis"
+    colorscale = "RdYlGn" if viz_type == "Position P&L" else "Viridis"
     
     # Determine center for P&L colormap
     if viz_type == "Position P&L":
-        vmax = max(abs(call_matrix.min()), abs(call_matrix.max()))
-        vmin = -vmax
-        center = 0
+        center_matrix = matrix if center_matrix is None else center_matrix
+        zmax = max(abs(center_matrix.min()), abs(center_matrix.max()))
+        zmin = -zmax
+        zmid = 0
     else:
-        vmin = None
-        vmax = None
-        center = None
-    
-    # Call option heatmap
-    fig_call, ax_call = plt.subplots(figsize=(10, 8))
-    sns.heatmap(
-        call_matrix,
-        xticklabels=np.round(spot_range, 2),
-        yticklabels=np.round(vol_range, 3),
-        annot=True,
-        fmt=fmt,
-        cmap=cmap,
-        center=center,
-        vmin=vmin,
-        vmax=vmax,
-        ax=ax_call
-    )
-    ax_call.set_title(f'CALL {title_prefix} Analysis')
-    ax_call.set_xlabel('Spot Price')
-    ax_call.set_ylabel('Volatility')
-    
-    # Put option heatmap
-    fig_put, ax_put = plt.subplots(figsize=(10, 8))
-    sns.heatmap(
-        put_matrix,
-        xticklabels=np.round(spot_range, 2),
-        yticklabels=np.round(vol_range, 3),
-        annot=True,
-        fmt=fmt,
-        cmap=cmap,
-        center=center,
-        vmin=vmin,
-        vmax=vmax,
-        ax=ax_put
+        zmin = None
+        zmax = None
+        zmid = None
+
+    fig = go.Figure(data=go.Heatmap(
+        z=matrix,
+        x=np.round(spot_range, 2),
+        y=np.round(vol_range, 3),
+        colorscale=colorscale,
+        zmin=zmin,
+        zmax=zmax,
+        zmid=zmid,
+        # Format labels client-side from z instead of shipping a rounded copy of the matrix
+        texttemplate=f"%{{z:.{decimals}f}}"
+    ))
+    fig.update_layout(
+        title=f'{option_label} {title_prefix} Analysis',
+        xaxis_title='Spot Price',
+        yaxis_title='Volatility',
+        height=700
     )
-    ax_put.set_title(f'PUT {title_prefix} Analysis')
-    ax_put.set_xlabel('Spot Price')
-    ax_put.set_ylabel('Volatility')
-    
-    return fig_call, fig_put
+    return fig
 
 
 # Main Page for Output Display
@@ -358,8 +376,7 @@ input_data = {
     "Position Size" : [kelly_allocation] # Display optimized position size
 }
 
-input_df = pd.DataFrame(input_data)
-st.table(input_df)
+st.dataframe(input_data, hide_index=True)
 
 # Calculate Call and Put values
 bs_model = BlackScholes(time_to_maturity, strike, current_price, volatility, interest_rate)
@@ -394,26 +411,44 @@ with col2:
         </div>
     """, unsafe_allow_html=True)
 
+# Plain floats/tuples so st.cache_data can hash the inputs
+heatmap_inputs = (
+    float(bs_model.time_to_maturity),
+    float(strike),
+    float(interest_rate),
+    tuple(np.round(spot_range, 6)),
+    tuple(np.round(vol_range, 6)),
+    position_units,
+    viz_type,
+    float(call_price),
+    float(put_price)
+)
+
+# Rebuild the heatmap figures whenever any pricing input changes;
+# unchanged inputs redisplay the figures kept in session state
+if st.session_state.get('heatmap_inputs') != heatmap_inputs:
+    call_matrix, put_matrix = compute_heatmap_matrices(*heatmap_inputs)
+    st.session_state['heatmap_inputs'] = heatmap_inputs
+    st.session_state['heatmap_viz_type'] = viz_type
+    st.session_state['heatmap_figs'] = (
+        render_heatmap(call_matrix, spot_range, vol_range, viz_type, "CALL"),
+        render_heatmap(put_matrix, spot_range, vol_range, viz_type, "PUT", center_matrix=call_matrix)
+    )
+heatmap_fig_call, heatmap_fig_put = st.session_state['heatmap_figs']
+# Describe the heatmap actually on screen
+heatmap_viz_type = st.session_state['heatmap_viz_type']
+
 st.markdown("")
-st.title(f"Options {viz_type} Interactive Heatmap")
-st.info(f"Explore how option {viz_type.lower()} fluctuate with varying 'Spot Prices and Volatility' levels using interactive heatmap parameters, all while maintaining a constant 'Strike Price'.")
+st.title(f"Options {heatmap_viz_type} Interactive Heatmap")
+st.info(f"Explore how option {heatmap_viz_type.lower()} fluctuate with varying 'Spot Prices and Volatility' levels using interactive heatmap parameters, all while maintaining a constant 'Strike Price'.")
 
 # Interactive Sliders and Heatmaps for Call and Put Options
 col1, col2 = st.columns([1,1], gap="small")
 
-heatmap_fig_call, heatmap_fig_put = plot_heatmap(
-    bs_model,
-    spot_range,
-    vol_range,
-    strike,
-    position_units,
-    viz_type
-)
-
 with col1:
     st.subheader("Call Option Analysis")
-    st.pyplot(heatmap_fig_call)
+    st.plotly_chart(heatmap_fig_call, use_container_width=True)
 
 with col2:
     st.subheader("Put Option Analysis")
-    st.pyplot(heatmap_fig_put)
+    st.plotly_chart(heatmap_fig_put, use_container_width=True)
@@ -49,7 +49,7 @@ class BlackScholes:
         # GREEKS
         # Delta
         self.call_delta = norm.cdf(d1)
-        self.put_delta = 1 - norm.cdf(d1)
+        self.put_delta = self.call_delta - 1.0
 
         # Gamma
         self.call_gamma = norm.pdf(d1) / (
@@ -0,0 +1,24 @@
+# cython: boundscheck=False, wraparound=False, cdivision=True, language_level=3
+from libc.math cimport log, sqrt, exp, erf, M_PI
+
+
+cdef inline double _ndtr(double x) nogil:
+    return 0.5 * (1.0 + erf(x * 0.7071067811865475))
+
+
+def price(double S, double K, double T, double r, double v):
+    """
+    Scalar Black-Scholes pricer (T in years).
+
+    Returns:
+    - tuple: (call_price, put_price, call_delta, gamma)
+    """
+    cdef double sT = sqrt(T)
+    cdef double vsT = v * sT
+    cdef double disc = K * exp(-r * T)
+    cdef double d1 = (log(S / K) + (r + 0.5 * v * v) * T) / vsT
+    cdef double d2 = d1 - vsT
+    cdef double Nd1 = _ndtr(d1)
+    cdef double Nd2 = _ndtr(d2)
+    cdef double gamma = exp(-0.5 * d1 * d1) / sqrt(2.0 * M_PI) / (K * vsT)
+    return S * Nd1 - disc * Nd2, disc * (1.0 - Nd2) - S * (1.0 - Nd1), Nd1, gamma
@@ -1,21 +1,59 @@
 # import modules
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yfinance as yf
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 
-def get_options_chain(ticker, expiration):
+def __getattr__(name):
+    # Re-export the batch Black-Scholes pricer and the rolling correlation kernel, imported
+    # lazily so numba is only loaded (and its kernels compiled) for callers that use them
+    if name == 'bs_batch':
+        from pricing_kernel import bs_batch
+        return bs_batch
+    if name == 'rolling_corr':
+        from pricing_kernel import rolling_corr
+        return rolling_corr
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Option chain columns used by the CPIV and IV skew helpers
+CHAIN_COLS = ['strike', 'impliedVolatility', 'openInterest', 'volume']
+
+
+@functools.lru_cache(maxsize=512)
+def _ticker(symbol):
+    """
+    Shared yf.Ticker instance per symbol
+    """
+    return yf.Ticker(symbol)
+
+@functools.lru_cache(maxsize=4096)
+def _option_chain_cached(symbol, expiration):
+    """
+    Fetch the (calls, puts) DataFrames for a symbol and expiration, memoized per pair
+    """
+    option_chain = _ticker(symbol).option_chain(expiration) # Returns tuple (calls, puts)
+    # Keep only the columns the toolkit uses; copy() makes each a compact standalone block
+    return option_chain.calls[CHAIN_COLS].copy(), option_chain.puts[CHAIN_COLS].copy()
+
+def clear_caches():
     """
-    Get the current options chain based on a ticker and expiration date
+    Drop memoized Ticker objects, option chains, price history and the VIX level
+    so the next calls refetch from Yahoo
     """
-    ticker_obj = yf.Ticker(ticker)
-    option_chain = ticker_obj.option_chain(expiration) # Returns tuple (calls, puts)
+    _ticker.cache_clear()
+    _option_chain_cached.cache_clear()
+    _cached_download.cache_clear()
+    _vix_close.cache_clear()
 
+def get_options_chain(ticker, expiration):
+    """
+    Get the current options chain based on a ticker and expiration date.
+    Chains are memoized per (ticker, expiration); call clear_caches() to refetch.
+    """
     # process calls and puts
-    calls = option_chain.calls
-    puts = option_chain.puts
+    calls, puts = _option_chain_cached(ticker, expiration)
 
     return {'calls': calls, 'puts':puts}
 
@@ -24,20 +62,29 @@ def plot_IVskew(ticker, expiration):
     Plot the Implied Volatility skew chart, weighted by volume and open interest.
     The aim is visualize Implied Volatility accross different strikes for both calls and puts.
     """
+    import matplotlib.pyplot as plt  # imported lazily: only the plotting helpers need it
+
     chain_data = get_options_chain(ticker, expiration)
-    current_price = yf.Ticker(ticker).info['regularMarketPrice'] # Live price
+    try:
+        # fast_info hits a lighter endpoint than the full .info quote summary
+        current_price = _ticker(ticker).fast_info['last_price'] # Live price
+    except KeyError:
+        current_price = _ticker(ticker).info['regularMarketPrice']
 
-    plt.figure(figsize=(14,7))
+    # Reuse (and clear) the same figure across calls instead of building a new one each time
+    fig, ax = plt.subplots(num='IV Skew', figsize=(14,7), clear=True)
 
-    sns.lineplot(x='strike', y='impliedVolatility', data=chain_data['puts'], marker='o', color='blue', label='Puts')
-    sns.lineplot(x='strike', y='impliedVolatility', data=chain_data['calls'], marker='s', color='red', label='Calls')
-    plt.axvline(x=current_price, linestyle='--', color='green', label='Current Price')  
+    puts = chain_data['puts']
+    calls = chain_data['calls']
+    ax.plot(puts['strike'].to_numpy(), puts['impliedVolatility'].to_numpy(), marker='o', color='blue', label='Puts')
+    ax.plot(calls['strike'].to_numpy(), calls['impliedVolatility'].to_numpy(), marker='s', color='red', label='Calls')
+    ax.axvline(x=current_price, linestyle='--', color='green', label='Current Price')  
 
-    plt.title(f'Implied Volatility Skew by Strike Prices - Expiration: {expiration}')
-    plt.xlabel('Strike Prices')
-    plt.ylabel('Implied Volatility')
-    plt.legend()
-    plt.grid(True)
+    ax.set_title(f'Implied Volatility Skew by Strike Prices - Expiration: {expiration}')
+    ax.set_xlabel('Strike Prices')
+    ax.set_ylabel('Implied Volatility')
+    ax.legend()
+    ax.grid(True)
     plt.show()
 
 def calculate_weighted_cpivs(ticker, expiration):
@@ -51,124 +98,217 @@ def calculate_weighted_cpivs(ticker, expiration):
     float: CPIV in the magnitude of implied volatility
     """
 
+    from pricing_kernel import cpiv_kernel  # imported lazily: numba is slow to import
+
     chain_data = get_options_chain(ticker, expiration)
-    
-    # Weighted average IV for calls
-    calls = chain_data['calls']
-    weighted_avg_iv_call = (calls['impliedVolatility'] * (calls['openInterest'] + calls['volume'])).sum() / (calls['openInterest'] + calls['volume']).sum()
-    
-    # Weighted average IV for puts
-    puts = chain_data['puts']
-    weighted_avg_iv_put = (puts['impliedVolatility'] * (puts['openInterest'] + puts['volume'])).sum() / (puts['openInterest'] + puts['volume']).sum()
-    
-    # CPIV
-    weighted_cpiv = weighted_avg_iv_call - weighted_avg_iv_put
+
+    # A single packed chain goes through the same kernel as the multi-ticker sweeps
+    weighted_cpiv = cpiv_kernel(*_pack_chains([chain_data]))[0]
     return weighted_cpiv
 
+def _pack_chains(chains):
+    """
+    Flatten option chains into structure-of-arrays form for pricing_kernel.cpiv_kernel: IVs, weights
+    (open interest + volume), a call/put flag, and offsets delimiting each chain's rows
+    """
+    legs = []
+    is_call = []
+    for chain in chains:
+        legs += [chain['calls'], chain['puts']]
+        is_call += [np.ones(len(chain['calls']), dtype=np.uint8), np.zeros(len(chain['puts']), dtype=np.uint8)]
+    # nan_to_num matches pandas' skipna sums: missing weights/IVs contribute nothing
+    iv = np.nan_to_num(np.concatenate([leg['impliedVolatility'].to_numpy(dtype=np.float64) for leg in legs]))
+    w = np.nan_to_num(np.concatenate([leg['openInterest'].to_numpy(dtype=np.float64) + leg['volume'].to_numpy(dtype=np.float64)
+                                      for leg in legs]))
+    offsets = np.zeros(len(chains) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(chain['calls']) + len(chain['puts']) for chain in chains])
+    return iv, w, np.concatenate(is_call), offsets
+
+def _sort_and_print_cpivs(cpiv_data):
+    """
+    Sort CPIV records by CPIV in descending order, print them and return them as a list of dicts
+    """
+    cpiv_df = pd.DataFrame(cpiv_data, columns=['Ticker', 'Expiration', 'CPIV']).sort_values('CPIV', ascending=False)
+
+    # Print or return the sorted data
+    for item in cpiv_df.itertuples(index=False):
+        print(f"{item.Ticker} - Expiration: {item.Expiration}, CPIV: {item.CPIV}")
+
+    return cpiv_df.to_dict('records')
+
 def get_and_sort_cpivs_for_tickers(tickers):
     """
     Get CPIV spread for all tickers provided for all expirations posible
     """
-    cpiv_data = []
+    from pricing_kernel import cpiv_kernel  # imported lazily: numba is slow to import
 
-    for ticker in tickers:
-        try:
-            ticker_obj = yf.Ticker(ticker)
-            expirations = ticker_obj.options # list of expirations dates
-            for expiration in expirations:
-                cpiv = calculate_weighted_cpivs(ticker, expiration)
-                cpiv_data.append({'Ticker': ticker, 'Expiration': expiration, 'CPIV': cpiv})
-
-        except Exception as e:
-            print(f"Error processing {ticker}: {e}")
+    # Expiration lists are one request per ticker; fetch them concurrently too
+    jobs = []
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {executor.submit(lambda t: _ticker(t).options, ticker): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                expirations = future.result() # list of expirations dates
+                jobs.extend((ticker, expiration) for expiration in expirations)
+            except Exception as e:
+                print(f"Error processing {ticker}: {e}")
 
-    # Sort the list of dictionaries by CPIV in descending order
-    sorted_cpiv_data = sorted(cpiv_data, key=lambda x: x['CPIV'], reverse=True)
+    # Each chain is a separate HTTP round-trip, so fetch them concurrently
+    fetched = []
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = {executor.submit(get_options_chain, ticker, expiration): (ticker, expiration)
+                   for ticker, expiration in jobs}
+        for future in as_completed(futures):
+            ticker, expiration = futures[future]
+            try:
+                fetched.append((ticker, expiration, future.result()))
+            except Exception as e:
+                print(f"Error processing {ticker} {expiration}: {e}")
 
-    # Print or return the sorted data
-    for item in sorted_cpiv_data:
-        print(f"{item['Ticker']} - Expiration: {item['Expiration']}, CPIV: {item['CPIV']}")
+    # Compute every chain's CPIV in a single kernel pass
+    cpiv_data = []
+    if fetched:
+        cpivs = cpiv_kernel(*_pack_chains([chain for _, _, chain in fetched]))
+        cpiv_data = [{'Ticker': ticker, 'Expiration': expiration, 'CPIV': cpiv}
+                     for (ticker, expiration, _), cpiv in zip(fetched, cpivs)]
 
-    return sorted_cpiv_data
+    return _sort_and_print_cpivs(cpiv_data)
 
 def get_CPIVbyExpiration(tickers, expiration):
     """
     Get CPIV spread for all tickers provided and a given expiration
     """
+    from pricing_kernel import cpiv_kernel  # imported lazily: numba is slow to import
+
+    # Fetch every ticker's chain for this expiration concurrently
+    chains = {}
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = {executor.submit(get_options_chain, ticker, expiration): ticker for ticker in tickers}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                chains[ticker] = future.result()
+            except Exception as e:
+                print(f"Error processing {ticker}: {e}")
+
     cpiv_data = []
+    if chains:
+        # Calculate CPIV for all tickers in a single kernel pass
+        cpivs = cpiv_kernel(*_pack_chains(list(chains.values())))
+        cpiv_data = [{'Ticker': ticker, 'Expiration': expiration, 'CPIV': cpiv}
+                     for ticker, cpiv in zip(chains, cpivs)]
 
-    for ticker in tickers:
-        try:
-            # Calculate CPIV for the current options chain
-            cpiv = calculate_weighted_cpivs(ticker, expiration)
-            # Append ticker, expiration, and CPIV to the list
-            cpiv_data.append({'Ticker': ticker, 'Expiration': expiration, 'CPIV': cpiv})
-        except Exception as e:
-            print(f"Error processing {ticker}: {e}")
+    return _sort_and_print_cpivs(cpiv_data)
 
-    # Sort the list of dictionaries by CPIV in descending order
-    sorted_cpiv_data = sorted(cpiv_data, key=lambda x: x['CPIV'], reverse=True)
+_VIX = _ticker('^VIX')
 
-    # Print or return the sorted data
-    for item in sorted_cpiv_data:
-        print(f"{item['Ticker']} - Expiration: {item['Expiration']}, CPIV: {item['CPIV']}")
+# VIX level used when it cannot be fetched
+VIX_FALLBACK = 15
+
+# How long a fetched VIX level is reused before asking Yahoo again
+_VIX_TTL = '5min'
+
+@functools.lru_cache(maxsize=1)
+def _vix_close(time_key):
+    """
+    Latest VIX close, memoized per time_key (one history request per TTL window)
+    """
+    vix_data = _VIX.history(period='1d', interval='1d')
+    if vix_data.empty:
+        raise ValueError("No VIX data returned")
+    return vix_data['Close'].iloc[-1].round(2)
+
+def get_current_vix():
+    """
+    Get the latest VIX close (intraday during the US session), fetched at most once per 5-minute window
+    """
+    # Bucket in UTC: a local (DST-observing) zone makes floor() ambiguous in the fall-back hour
+    return _vix_close(pd.Timestamp.now('UTC').floor(_VIX_TTL))
 
-    return sorted_cpiv_data
+# VIX tier boundaries and the maximum premium allocation (MPA) for each tier
+_VIX_TIERS = np.array([15, 20, 30, 40])
+_VIX_ALLOCATIONS = np.array([0.25, 0.30, 0.35, 0.40, 0.50])
 
-def vix_dynamic_allocation(balance=5000):
+def vix_dynamic_allocation(balance=5000, vix=None):
     """
     Dynamically determine the maximum portfolio allocation to short premium strategies based on the VIX.
     
     Parameters:
     - balance (float): Portfolio balance (default=5000).
-    - fallback_vix (float): Fallback VIX value if fetching fails (default=20.0).
+    - vix (float): Current VIX level. If None, it is fetched with yfinance, falling back to VIX_FALLBACK on failure (default=None).
     
     Returns:
     - float: Maximum allocation amount based on VIX.
     """
-    try:
-        # Fetch VIX data using history for the latest close (more reliable than info)
-        vix_ticker = yf.Ticker('^VIX')
-        vix_data = vix_ticker.history(period='1d', interval='1d')
-        if vix_data.empty:
-            raise ValueError("No VIX data returned")
-        current_vix = vix_data['Close'].iloc[-1].round(2)
-    except Exception as e:
-        print(f"Error fetching VIX with yfinance: {e}")
-        current_vix = 15  # Use fallback value
-    
-    # Define allocation tiers
-    if current_vix < 15:
-        allocation_percentage = 0.25  # 25% MPA
-    elif 15 <= current_vix < 20:
-        allocation_percentage = 0.3   # 30% MPA
-    elif 20 <= current_vix < 30:
-        allocation_percentage = 0.35  # 35% MPA
-    elif 30 <= current_vix < 40:
-        allocation_percentage = 0.4   # 40% MPA
+    if vix is not None:
+        current_vix = vix
     else:
-        allocation_percentage = 0.5   # 50% MPA
+        try:
+            # Fetch VIX data using history for the latest close (more reliable than info)
+            current_vix = get_current_vix()
+        except Exception as e:
+            print(f"Error fetching VIX with yfinance: {e}")
+            current_vix = VIX_FALLBACK  # Use fallback value
+    
+    # Look up the allocation tier: VIX <15, 15-20, 20-30, 30-40, >=40
+    allocation_percentage = _VIX_ALLOCATIONS[np.searchsorted(_VIX_TIERS, current_vix, side='right')]
     
     allocation_value = balance * allocation_percentage
     print(f"VIX: {current_vix}, Allocation: {allocation_percentage*100}% of ${balance} = ${allocation_value:.2f}")
     return allocation_value
 
+@functools.lru_cache(maxsize=64)
+def _cached_download(symbols, period, interval):
+    """
+    Download adjusted close prices for a sorted tuple of symbols, memoized per (symbols, period, interval).
+    The memo is in-process only; nothing is persisted between runs.
+    """
+    # Use yf.download for efficiency with multiple tickers; skip the progress bar and
+    # read Yahoo's own adjusted close instead of having yfinance re-adjust every column
+    prices = yf.download(list(symbols), period=period, interval=interval, threads=True,
+                         progress=False, auto_adjust=False, group_by='column')['Adj Close']
+    if isinstance(prices, pd.Series):  # Handle single ticker case
+        prices = prices.to_frame(name=symbols[0])
+    # Yahoo quotes carry ~6 significant digits, so float32 halves the cached footprint;
+    # _log_returns upcasts to float64 before any accumulation
+    return prices.astype(np.float32)
+
 def get_prices(tickers, period='1y'):
     """
     Fetch a DataFrame of adjusted close prices for a list of tickers over a given period.
+    Downloads are memoized per (ticker set, period); call clear_caches() to refetch.
     
     Parameters:
     - tickers (list): List of ticker symbols (e.g., ['AAPL', 'MSFT']).
     - period (str): Period for data (e.g., '30d', '1mo', '1y', 'max'). Default is '1y'.
     
     Returns:
-    - pd.DataFrame: Adjusted close prices.
+    - pd.DataFrame: Adjusted close prices (float32).
     """
-    # Use yf.download for efficiency with multiple tickers
-    prices = yf.download(tickers, period=period, interval='1d')['Close']
-    if isinstance(prices, pd.Series):  # Handle single ticker case
-        prices = prices.to_frame(name=tickers[0])
-    return prices
+    # Downloads are shared by every caller asking for the same ticker set and period;
+    # selecting the columns returns a new frame, so callers never mutate the cached one
+    prices = _cached_download(tuple(sorted(set(tickers))), period, '1d')
+    return prices[list(tickers)]
+
+def _log_returns(prices):
+    """
+    (T-1 x N) array of log returns of a price DataFrame, dropping rows with any NaN
+    """
+    returns = np.diff(np.log(prices.to_numpy(dtype=np.float64)), axis=0)
+    return returns[~np.isnan(returns).any(axis=1)]
+
+def _corr_matrix(R):
+    """
+    Pearson correlation matrix of the columns of a (T x N) returns array, from the
+    sums Σx, Σx² and Σxy (one matrix product instead of N² pairwise passes)
+    """
+    n = R.shape[0]
+    sx = R.sum(axis=0)
+    sxx = (R * R).sum(axis=0)
+    sxy = R.T @ R
+    var = n * sxx - sx * sx
+    return (n * sxy - np.outer(sx, sx)) / np.sqrt(np.outer(var, var))
 
 def corr_2assets(ticker1, ticker2, period='1y'):
     """
@@ -183,8 +323,8 @@ def corr_2assets(ticker1, ticker2, period='1y'):
     - float: Correlation coefficient.
     """
     prices = get_prices([ticker1, ticker2], period=period)
-    returns = prices.pct_change().dropna()
-    correlation = returns[ticker1].corr(returns[ticker2])
+    returns = _log_returns(prices[[ticker1, ticker2]])
+    correlation = _corr_matrix(returns)[0, 1]
     return correlation
 
 def show_corr_matrix(tickers, period='1y'):
@@ -199,11 +339,12 @@ def show_corr_matrix(tickers, period='1y'):
     - Styled DataFrame: Correlation matrix with gradient.
     """
     prices = get_prices(tickers, period=period)
-    returns = prices.pct_change().dropna()
+    returns = _log_returns(prices)
     if len(tickers) < 2:
         print("Provide at least two tickers for correlation.")
         return None
-    corr_matrix = returns.corr().style.background_gradient(cmap='coolwarm')
+    corr_matrix = pd.DataFrame(_corr_matrix(returns), index=prices.columns, columns=prices.columns)
+    corr_matrix = corr_matrix.style.background_gradient(cmap='coolwarm')
     return corr_matrix
 
 def plot_corr_over_time(ticker1, ticker2, period='1y', window=30):
@@ -216,12 +357,19 @@ def plot_corr_over_time(ticker1, ticker2, period='1y', window=30):
     - period (str): Period for data (e.g., '30d', '1mo', '1y', 'max'). Default is '30d'.
     - window (int): Rolling window size in days (default=30).
     """
-    prices = yf.download([ticker1, ticker2], period=period, interval='1d')['Close']
-    returns = prices.pct_change().dropna()
-    rolling_corr = returns[ticker1].rolling(window=window).corr(returns[ticker2])
+    import matplotlib.pyplot as plt  # imported lazily: only the plotting helpers need it
+    from pricing_kernel import rolling_corr  # imported lazily: numba is slow to import
+
+    # Drop missing prices up front so the returns line up with prices.index[1:]
+    prices = get_prices([ticker1, ticker2], period=period).dropna()
+    returns = _log_returns(prices)
+    # Column slices of the row-major returns array are strided; hand the kernel contiguous
+    # copies and only wrap the result in a Series for plotting
+    corr = rolling_corr(np.ascontiguousarray(returns[:, 0]), np.ascontiguousarray(returns[:, 1]), window)
+    corr = pd.Series(corr, index=prices.index[1:])
     
     plt.figure(figsize=(12, 6))
-    rolling_corr.plot()
+    corr.plot()
     plt.title(f'Rolling {window}-Day Correlation Between {ticker1} and {ticker2}')
     plt.xlabel('Date')
     plt.ylabel('Correlation')
@@ -230,10 +378,14 @@ def plot_corr_over_time(ticker1, ticker2, period='1y', window=30):
     plt.show()
 
 
-def kelly_criterion_allocation(r=0.05, dte=45, pop=0.7):
+def kelly_criterion_allocation(r=0.05, dte=45, pop=0.7, verbose=False):
     """
-    Calculates the proportion of capital to allocate to a position based on the POP 
+    Calculates the proportion of capital to allocate to a position based on the POP.
+    dte and pop may be scalars or NumPy arrays (e.g. a DTE x POP grid), evaluated by broadcasting.
     """
-    f = r * (dte / 365) * (pop / (1-pop))
-    print(f"Kelly Criterion Position Size: {round(f,4)}" )
-    return f
\ No newline at end of file
+    dte = np.asarray(dte, dtype=np.float32)
+    pop = np.asarray(pop, dtype=np.float32)
+    f = r * (dte * (1 / 365.0)) * (pop / (1.0 - pop))
+    if verbose:
+        print(f"Kelly Criterion Position Size: {np.round(f,4)}" )
+    return f
@@ -0,0 +1,147 @@
+# import modules
+import numpy as np
+from math import log, sqrt, exp, erf, copysign
+from numba import njit, prange, guvectorize
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def heatmap_prices(spots, vols, T, r, K):
+    """
+    Price European calls and puts over a (volatility x spot) grid.
+
+    Parameters:
+    - spots (np.ndarray): Spot prices, one per column.
+    - vols (np.ndarray): Volatilities, one per row.
+    - T (float): Time to maturity in years.
+    - r (float): Risk-free interest rate.
+    - K (float): Strike price.
+
+    Returns:
+    - tuple: (call_matrix, put_matrix), each of shape (len(vols), len(spots)).
+    """
+    nv, ns = vols.size, spots.size
+    call = np.empty((nv, ns))
+    put = np.empty((nv, ns))
+    sT = sqrt(T)
+    disc = K * exp(-r * T)
+    for i in prange(nv):
+        v = vols[i]
+        vsT = v * sT
+        for j in range(ns):
+            S = spots[j]
+            d1 = (log(S / K) + (r + 0.5 * v * v) * T) / vsT
+            d2 = d1 - vsT
+            # math.erf keeps the kernel nopython-typable (scipy.special is not)
+            Nd1 = 0.5 * (1.0 + erf(d1 / 1.4142135623730951))
+            Nd2 = 0.5 * (1.0 + erf(d2 / 1.4142135623730951))
+            call[i, j] = S * Nd1 - disc * Nd2
+            put[i, j] = disc * (1.0 - Nd2) - S * (1.0 - Nd1)
+    return call, put
+
+
+@njit(fastmath=True, inline='always')
+def norm_cdf_as(x):
+    """
+    Branchless standard normal CDF via the Abramowitz & Stegun 7.1.26 erf
+    approximation (max abs error ~1.5e-7), evaluated at |x| / sqrt(2).
+    """
+    a1, a2, a3, a4, a5 = 0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429
+    p = 0.3275911
+    z = abs(x) * 0.7071067811865476
+    t = 1.0 / (1.0 + p * z)
+    y = 1.0 - ((((a5 * t + a4) * t + a3) * t + a2) * t + a1) * t * exp(-z * z)
+    return 0.5 * (1.0 + copysign(y, x))
+
+
+def _bs_batch(S, K, T, r, sigma, call, put):
+    """
+    Price a batch of European calls and puts sharing maturity, rate and volatility.
+
+    Parameters:
+    - S (np.ndarray): Spot prices.
+    - K (np.ndarray): Strike prices, same length as S.
+    - T (float): Time to maturity in years.
+    - r (float): Risk-free interest rate.
+    - sigma (float): Volatility.
+
+    Returns:
+    - tuple: (call_prices, put_prices), arrays shaped like S.
+    """
+    sT = sqrt(T)
+    vsT = sigma * sT
+    disc_r = exp(-r * T)
+    for i in range(S.shape[0]):
+        d1 = (log(S[i] / K[i]) + (r + 0.5 * sigma * sigma) * T) / vsT
+        d2 = d1 - vsT
+        Nd1 = norm_cdf_as(d1)
+        Nd2 = norm_cdf_as(d2)
+        disc = K[i] * disc_r
+        call[i] = S[i] * Nd1 - disc * Nd2
+        put[i] = disc * (1.0 - Nd2) - S[i] * (1.0 - Nd1)
+
+
+@njit(parallel=True, cache=True, error_model='numpy')
+def cpiv_kernel(iv, w, is_call, offsets):
+    """
+    Weighted CPIV of every chain packed by equities_options_toolkit._pack_chains,
+    one chain per parallel iteration.
+    """
+    n_chains = offsets.size - 1
+    out = np.empty(n_chains)
+    for k in prange(n_chains):
+        num_c = den_c = num_p = den_p = 0.0
+        for i in range(offsets[k], offsets[k + 1]):
+            if is_call[i]:
+                num_c += iv[i] * w[i]
+                den_c += w[i]
+            else:
+                num_p += iv[i] * w[i]
+                den_p += w[i]
+        out[k] = num_c / den_c - num_p / den_p
+    return out
+
+
+@njit(cache=True, fastmath=True, error_model='numpy')
+def rolling_corr(x, y, window):
+    """
+    Rolling Pearson correlation of two equal-length arrays, keeping running sums
+    (Σx, Σy, Σx², Σy², Σxy) so each step is O(1). The first window-1 values are NaN.
+    """
+    n = x.size
+    out = np.full(n, np.nan)
+    sx = sy = sxx = syy = sxy = 0.0
+    for i in range(n):
+        xi = x[i]
+        yi = y[i]
+        sx += xi
+        sy += yi
+        sxx += xi * xi
+        syy += yi * yi
+        sxy += xi * yi
+        if i >= window:
+            # drop the observation leaving the window
+            xo = x[i - window]
+            yo = y[i - window]
+            sx -= xo
+            sy -= yo
+            sxx -= xo * xo
+            syy -= yo * yo
+            sxy -= xo * yo
+        if i >= window - 1:
+            cov = window * sxy - sx * sy
+            var_x = window * sxx - sx * sx
+            var_y = window * syy - sy * sy
+            out[i] = cov / np.sqrt(var_x * var_y)
+    return out
+
+
+def __getattr__(name):
+    # Build bs_batch on first access: guvectorize with explicit signatures compiles at
+    # decoration time, which every importer of this module would otherwise pay for
+    if name == 'bs_batch':
+        bs_batch = guvectorize(['void(f8[:], f8[:], f8, f8, f8, f8[:], f8[:])'],
+                               '(n),(n),(),(),()->(n),(n)', target='parallel', fastmath=True,
+                               cache=True)(_bs_batch)
+        globals()['bs_batch'] = bs_batch
+        return bs_batch
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,9 @@
+# Builds the optional compiled pricer used by BS_streamlit_app.BlackScholes:
+#     python setup.py build_ext --inplace
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="bs_pricer",
+    ext_modules=cythonize("bs_pricer.pyx"),
+)